@@ -6,60 +6,129 @@
 
 import calendar
 from datetime import datetime
+from functools import lru_cache
 
-def render_calendar(year=None, month=None):
+ATTR_EMPTY = 0
+ATTR_NORMAL = 1
+ATTR_HIGHLIGHT = 2
+ATTR_HEADER = 3
+
+MONTH_WIDTH = 20  # "Su Mo Tu We Th Fr Sa"
+MONTH_HEIGHT = 9  # Title, blank line, weekday header and 6 weeks
+MONTH_GAP_X = 2
+MONTH_GAP_Y = 1
+
+# First weekday names accepted by -fw
+WEEKDAYS = {
+    "mon": calendar.MONDAY,
+    "tue": calendar.TUESDAY,
+    "wed": calendar.WEDNESDAY,
+    "thu": calendar.THURSDAY,
+    "fri": calendar.FRIDAY,
+    "sat": calendar.SATURDAY,
+    "sun": calendar.SUNDAY,
+}
+
+# Adjust month and year if out of range
+def normalize_month(year, month):
+    year += (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return year, month
+
+# Build one month as fixed-size (text, attr) lines, cached so it is only computed once
+@lru_cache(maxsize=256)
+def month_block(year, month, firstweekday=calendar.SUNDAY, show_year=True):
+    # A local Calendar avoids touching the global calendar.setfirstweekday state
+    cal = calendar.Calendar(firstweekday)
+    month_name = calendar.month_name[month]
+    header = f"{month_name} {year}" if show_year else month_name
+
+    lines = [(header.center(MONTH_WIDTH), ATTR_HEADER), ("", ATTR_EMPTY)]
+    weekday_header = " ".join(calendar.day_abbr[day][:2] for day in cal.iterweekdays())
+    lines.append((weekday_header, ATTR_HIGHLIGHT)) # Weekday header highlight
+
+    for week in cal.monthdayscalendar(year, month):
+        week_str = " ".join(f"{day:02}" if day else "  " for day in week)
+        lines.append((week_str, ATTR_NORMAL))
+
+    # Pad to 6 weeks so every month has the same height
+    while len(lines) < MONTH_HEIGHT:
+        lines.append(("", ATTR_EMPTY))
+
+    return tuple(lines)
+
+# Months shown for a view: the selected month, the 3 around it or the whole year
+def view_months(year, month, count):
+    if count == 12:
+        return [(year, m) for m in range(1, 13)]
+    if count == 3:
+        return [normalize_month(year, month + offset) for offset in (-1, 0, 1)]
+    return [(year, month)]
+
+# Width and height of a view with count months laid out in columns
+def layout_size(count, columns):
+    columns = min(columns, count)
+    rows_of_blocks = (count + columns - 1) // columns
+    width = columns * (MONTH_WIDTH + MONTH_GAP_X) - MONTH_GAP_X
+    height = rows_of_blocks * (MONTH_HEIGHT + MONTH_GAP_Y) - MONTH_GAP_Y
+    return width, height
+
+# Lay out the months of a view as rows of (x, text, attr) runs, cached per view
+@lru_cache(maxsize=32)
+def calendar_layout(year, month, count=1, columns=3, firstweekday=calendar.SUNDAY):
+    months = view_months(year, month, count)
+    columns = min(columns, len(months))
+    width, height = layout_size(len(months), columns)
+    rows = [[] for _ in range(height)]
+
+    for index, (block_year, block_month) in enumerate(months):
+        block = month_block(block_year, block_month, firstweekday, count != 12)
+        top = (index // columns) * (MONTH_HEIGHT + MONTH_GAP_Y)
+        left = (index % columns) * (MONTH_WIDTH + MONTH_GAP_X)
+        for i, (text, attr) in enumerate(block):
+            if text:
+                rows[top + i].append((left, text, attr))
+
+    return tuple(tuple(row) for row in rows), width
+
+# Layouts tried for each view, from the most to the least months per row
+VIEW_LAYOUTS = {
+    12: ((12, 6), (12, 4), (12, 3), (12, 2), (3, 3), (3, 1), (1, 1)),
+    3: ((3, 3), (3, 1), (1, 1)),
+    1: ((1, 1),),
+}
+
+# Pick the first (count, columns) layout that fits the terminal, the view shrinks if none does
+def choose_layout(count, width, height):
+    for layout_count, columns in VIEW_LAYOUTS[count]:
+        layout_width, layout_height = layout_size(layout_count, columns)
+        # Room for the hints below and, in the 12 month view, the year title above
+        extra_rows = 6 if layout_count == 12 else 3
+        if layout_width <= width and layout_height + extra_rows <= height:
+            return layout_count, columns
+    return 1, 1
+
+# Position of the current day inside a view layout, or None if it is not shown
+def today_position(year, month, count=1, columns=3, firstweekday=calendar.SUNDAY, now=None):
+    now = now or datetime.now()
+    months = view_months(year, month, count)
+    if (now.year, now.month) not in months:
+        return None
+
+    columns = min(columns, len(months))
+    index = months.index((now.year, now.month))
+    offset = (calendar.weekday(now.year, now.month, 1) - firstweekday) % 7 + now.day - 1
+    y = (index // columns) * (MONTH_HEIGHT + MONTH_GAP_Y) + 3 + offset // 7
+    x = (index % columns) * (MONTH_WIDTH + MONTH_GAP_X) + (offset % 7) * 3
+    return y, x, f"{now.day:02}"
+
+def render_calendar(year=None, month=None, count=1, columns=3, firstweekday=calendar.SUNDAY):
     now = datetime.now()
     if year is None:
         year = now.year
     if month is None:
         month = now.month
-    
-    calendar.setfirstweekday(calendar.SUNDAY) # Set first day of the week to Sunday
-
-    # Adjust month and year if out of range
-    if month < 1:
-        month = 12
-        year -= 1
-    elif month > 12:
-        month = 1
-        year += 1
-    
-    cal = calendar.monthcalendar(year, month)
-    month_name = calendar.month_name[month]
-    header = f"{month_name} {year}"
-    
-    lines = [header.center(20)]
-    lines.append("")
-    lines.append("Su Mo Tu We Th Fr Sa") # Weekday header
-
-    # Lists to stores lines and attributes
-    formatted_lines = []
-    attributes = []
-
-    # Weekday header highlight
-    weekday_attrs = [2 for _ in lines[0]]
-    attributes.append(weekday_attrs)
-
-    current_day = now.day if year == now.year and month == now.month else None
-
-    ATTR_EMPTY = 0
-    ATTR_NORMAL = 1
-    ATTR_HIGHLIGHT = 2
-
-    for week in cal:
-        week_str = ""
-        week_attrs = []
-        for day in week:
-            if day == 0:
-                week_str += "   "
-                week_attrs.extend([ATTR_EMPTY, ATTR_EMPTY, ATTR_EMPTY])
-            else:
-                week_str += f"{day:02} "
-                if day == current_day:
-                    week_attrs.extend([ATTR_HIGHLIGHT, ATTR_HIGHLIGHT, ATTR_NORMAL]) # Highlight only for 2 digits of current day
-                else:
-                    week_attrs.extend([ATTR_NORMAL, ATTR_NORMAL, ATTR_NORMAL]) # All characters are normal
-        formatted_lines.append(week_str.rstrip())
-        attributes.append(week_attrs)
-
-    return lines + formatted_lines, attributes
+
+    year, month = normalize_month(year, month)
+    rows, width = calendar_layout(year, month, count, columns, firstweekday)
+    return rows, width, today_position(year, month, count, columns, firstweekday, now)
@@ -11,9 +11,16 @@
 
 from modes import draw_clock, draw_calendar, draw_stopwatch, draw_timer, help_menu
 from datetime import datetime
-from tools import Keys
+from persist import load_state, save_state, load_weather
+from temperature import TempHistory
+from power import next_redraw, wait_timeout, WakeupCounter
+from record import Recorder
+from keymap import load_bindings, build_keymaps, key_labels
 import argparse
+import atexit
 import curses
+import os
+import signal
 import time
 import sys
 
@@ -31,13 +38,25 @@ def parse_args():
     parser.add_argument("-bd", default="false", help="Use bold characters (default=False)")
     parser.add_argument("-s", default="true", help="Show/Hide seconds (default=True)")
     parser.add_argument("-a", default="true", help="Stop timer/stopwatch after reset (default=True)")
+    parser.add_argument("-cv", default="1", help="Calendar view: 1 (default), 3 or 12 months")
+    parser.add_argument("-fw", default="sun", help="First day of the week: sun (default), mon, tue, wed, thu, fri, sat")
+    parser.add_argument("-lp", default="false", help="Low-power mode, redraw only when the screen changes (default=False)")
+    parser.add_argument("-p", default="true", help="Save stopwatch/timer state across restarts (default=True)")
+    parser.add_argument("-th", default="true", help="Save temperature history across restarts (default=True)")
+    parser.add_argument("-k", metavar="FILE", help="Key bindings file (default: ~/.config/clocktemp/keys.conf)")
+    parser.add_argument("--record", metavar="FILE", help="Record the session to FILE as an asciicast v2 stream")
     parser.add_argument("-lat", default="0", help="Latitude of your current location")
     parser.add_argument("-lon", default="0", help="Longitude of your current location")
     parser.add_argument("-c", default="white", help="Text color: white (default), black, red, yellow, green, cyan, blue, magenta")
     parser.add_argument("-b", default="default", help="Background color: default (terminal default), white, black, red, yellow, green, cyan, blue, magenta")
 
     args = parser.parse_args()
-    return validate_args(args, parser)
+    args = validate_args(args, parser)
+
+    # -h and -v must work even with a broken key bindings file
+    if not args.help and not args.version:
+        load_keys(args, parser)
+    return args
 
 def validate_args(args, parser):
     # Valid arguments
@@ -48,6 +67,11 @@ def validate_args(args, parser):
         "bd": {"true", "false"},
         "s": {"true", "false"},
         "a": {"true", "false"},
+        "p": {"true", "false"},
+        "th": {"true", "false"},
+        "lp": {"true", "false"},
+        "cv": {"1", "3", "12"},
+        "fw": {"sun", "mon", "tue", "wed", "thu", "fri", "sat"},
         "c": {"white", "black", "red", "yellow", "green", "cyan", "blue", "magenta"},
         "b": {"default", "white", "black", "red", "yellow", "green", "cyan", "blue", "magenta"}
     }
@@ -61,8 +85,27 @@ def validate_args(args, parser):
         if value not in valid_values:
             parser.error(f"Invalid {key} option: {value}. Choose from {list(valid_values)}")
 
+    # Check the recording file can be written before curses starts
+    if args.record:
+        record_dir = os.path.dirname(os.path.abspath(args.record))
+        if os.path.isdir(args.record):
+            parser.error(f"Invalid --record file: {args.record} (Is a directory)")
+        if not os.path.isdir(record_dir):
+            parser.error(f"Invalid --record file: {args.record} (No such directory)")
+        if not os.access(args.record if os.path.exists(args.record) else record_dir, os.W_OK):
+            parser.error(f"Invalid --record file: {args.record} (Permission denied)")
+
     return args
 
+def load_keys(args, parser):
+    # Load key bindings into one dispatch table per mode and the labels shown in hints
+    try:
+        bindings = load_bindings(args.k)
+        args.keymaps = build_keymaps(bindings)
+        args.keylabels = key_labels(bindings)
+    except ValueError as e:
+        parser.error(str(e))
+
 def show_version():
     version_text = "ClockTemp version 1.2.1"
     print(version_text)
@@ -84,8 +127,15 @@ def show_help():
         -bd [true, false]    Use bold characters: false (default) to disable, true to enable
         -s [true, false]     Show/Hide seconds: true (default) to show, false to hide
         -a [true, false]     Stop timer/stopwatch after reset: true (default) to stop, false to continue
+        -cv [1, 3, 12]       Calendar view: 1 (default), 3 or 12 months
+        -fw DAY              First day of the week: sun (default), mon, tue, wed, thu, fri, sat
+        -lp [true, false]    Low-power mode, redraw only when the screen changes: false (default) to disable, true to enable
+        -p [true, false]     Save stopwatch/timer state across restarts: true (default) to save, false to disable
+        -th [true, false]    Save temperature history across restarts: true (default) to save, false to disable
         -c COLOR             Text color: white (default), black, red, yellow, green, cyan, blue, magenta
         -b COLOR             Background color: default (terminal default), white, black, red, yellow, green, cyan, blue, magenta
+        -k FILE              Key bindings file (default: ~/.config/clocktemp/keys.conf)
+        --record FILE        Record the session to FILE as an asciicast v2 stream
         -lat LATITUDE        Latitude of your current location: (default: 0)
         -lon LONGITUDE       Longitude of your current location: (default: 0)
 
@@ -97,8 +147,9 @@ def show_help():
         h                    Switch to help menu
         r                    Reset (only in stopwatch or timer modes)
         SPACEBAR             Pause/Resume (only in stopwatch or timer modes)
-        < or ,               Show previous month (only in calendar mode)
-        > or .               Show next month (only in calendar mode)
+        < or ,               Show previous month, or year in 12 month view (only in calendar mode)
+        > or .               Show next month, or year in 12 month view (only in calendar mode)
+        v                    Cycle 1, 3 and 12 month views (only in calendar mode)
         q or ESC             Quit program
 
         Note:
@@ -117,12 +168,15 @@ class initial_state:
         # Initialize variables for clock
         self.last_temp = ""                               # Stores the last temperature
         self.last_temp_update = 0                         # Temperature update time
+        self.temp_history = TempHistory()                 # Last temperature readings
         self.last_height, self.last_width = stdscr.getmaxyx() # Terminal size
         self.mode = "clock"                               # Default mode
 
         # Initialize variables for calendar
         self.calendar_year = datetime.now().year          # Calendar current year
         self.calendar_month = datetime.now().month        # Calendar current month
+        self.calendar_view = 1                            # Months shown: 1, 3 or 12
+        self.calendar_shown = 1                           # Months that fit on the terminal
 
         # Initialize variables for stopwatch
         self.stopwatch_start = time.time()
@@ -140,6 +194,15 @@ class initial_state:
 def main(stdscr, args):
 
     state = initial_state(stdscr)
+    state.calendar_view = int(args.cv)
+
+    # Restore stopwatch and timer from the last checkpoint
+    if args.p == "true":
+        load_state(state)
+
+    # Restore the temperature history and the last reading from the weather cache
+    if args.th == "true":
+        load_weather(state, args)
 
     # Map text color
     color_map = {
@@ -179,75 +242,45 @@ def main(stdscr, args):
     if args.b != "default":
         stdscr.bkgd(" ", curses.color_pair(1))
 
+    # Record every changed frame drawn on stdscr
+    if args.record:
+        color_pairs = {1: (text_color, background_color), 2: (inverted_text_color, inverted_background_color)}
+        stdscr = Recorder(stdscr, args.record, color_pairs)
+        atexit.register(stdscr.close)
+
+        # A dropped SSH session or kill skips atexit, save the recording before exiting
+        def stop_recording(signum, frame):
+            stdscr.close()
+            sys.exit(128 + signum)
+
+        signal.signal(signal.SIGHUP, stop_recording)
+        signal.signal(signal.SIGTERM, stop_recording)
+
     curses.curs_set(0) # Hide cursor
     stdscr.timeout(100) # 1 second ticker
     stdscr.nodelay(True)
 
+    wakeups = WakeupCounter()
+    deadline = time.time() # Draw the first frame right away
+
     while True:
         start_time = time.time()
 
-        key = stdscr.getch()
-
-        # Handle key events
-        if key in (Keys.q, Keys.Q, Keys.ESC): # Quit the program
-            break
-        elif key in (Keys.w, Keys.W): # Change to clock mode
-            state.mode = "clock"
-            state.timer_input_mode = False
-            curses.curs_set(0)
-        elif key in (Keys.c, Keys.C): # Change to calendar mode
-            state.mode = "calendar"
-            state.timer_input_mode = False
-            curses.curs_set(0)
-        elif key in (Keys.s, Keys.S): # Change to stopwatch mode
-            state.mode = "stopwatch"
-            state.timer_input_mode = False
-            curses.curs_set(0)
-        elif key in (Keys.t, Keys.T): # Change to timer mode
-            state.mode = "timer"
-            if state.timer_total_time == 0:
-                state.timer_input_mode = True
-        elif key in (Keys.h, Keys.H): # Change to help mode
-            state.mode = "help"
-            state.timer_input_mode = False
-
-        # Modes functions
-        elif key in (Keys.r, Keys.R):
-            if state.mode == "stopwatch": # Reset stopwatch
-                state.stopwatch_start = time.time()
-                state.stopwatch_accumulated = 0
-                state.stopwatch_running = args.a == "false"
-            elif state.mode == "timer": # Reset timer
-                state.timer_start = time.time()
-                state.timer_total_time = state.initial_time
-                state.timer_running = args.a == "false"
-
-        elif key == Keys.SPACE: # Pause/Resume stopwatch or timer
-            if state.mode == "stopwatch":
-                if state.stopwatch_running:
-                    state.stopwatch_accumulated += time.time() - state.stopwatch_start
-                    state.stopwatch_running = False
-                else:
-                    state.stopwatch_start = time.time()
-                    state.stopwatch_running = True
-            elif state.mode == "timer" and not state.timer_input_mode:
-                if state.timer_running:
-                    state.timer_running = False
-                else:
-                    state.timer_start = time.time() - (state.initial_time - state.timer_total_time)
-                    state.timer_running = True
-
-        elif state.mode == "calendar" and key in (Keys.LESS, Keys.COMMA): # Previous month
-            state.calendar_month -= 1
-            if state.calendar_month < 1:
-                state.calendar_month = 12
-                state.calendar_year -= 1
-
-        elif state.mode == "calendar" and key in (Keys.GREATER, Keys.DOT): # Next month
-            state.calendar_month += 1
-            if state.calendar_month > 12:
-                state.calendar_month = 1
-                state.calendar_year += 1
+        if args.lp == "true":
+            # Wait in getch until the screen can next change or a key is pressed
+            stdscr.timeout(wait_timeout(deadline, start_time))
+            key = stdscr.getch()
+            stdscr.nodelay(True)
+            start_time = time.time()
+        else:
+            key = stdscr.getch()
+        wakeups.tick()
+
+        # Handle key events, one table lookup for the current mode
+        if key != -1:
+            handler = args.keymaps[state.mode].get(key)
+            if handler is not None and handler(state, args):
+                break
 
         stdscr.erase()
 
@@ -267,21 +300,31 @@ def main(stdscr, args):
             state.stopwatch_accumulated, state.stopwatch_running = draw_stopwatch(stdscr, height, width, state, args)
 
         elif state.mode == "timer":
+            timer_was_running = state.timer_running
             state.timer_total_time, state.initial_time, state.timer_running, state.timer_input_mode = draw_timer(stdscr, height, width, state, args)
             # if timer is over return to clock mode
             if not state.timer_running and state.timer_total_time == 0:
                 state.mode = "clock"
                 state.timer_input_mode = True
+            # Checkpoint when the timer starts from input or finishes
+            if args.p == "true" and state.timer_running != timer_was_running:
+                save_state(state)
 
         elif state.mode == "help":  
             help_menu(stdscr, height, width, args)
     
         stdscr.refresh()
 
+        if args.lp == "true":
+            deadline = next_redraw(state, args, time.time())
+            continue
+
         elapsed_time = time.time() - start_time
         sleep_time = max(0, 0.02 - elapsed_time)
         time.sleep(sleep_time)
 
+    return wakeups
+
 if __name__ == "__main__":
     args = parse_args()
     if args.help:
@@ -289,4 +332,6 @@ if __name__ == "__main__":
     elif args.version:
         show_version()
     else:
-        curses.wrapper(main, args)
+        wakeups = curses.wrapper(main, args)
+        if args.lp == "true":
+            print(f"Wakeups per minute: {wakeups.per_minute():.1f}")
@@ -71,6 +71,22 @@ cp "$SOURCE_DIR/tools.py" "$DEST_DIR/" || {
     echo "Error: Failed to copy tools.py"
     exit 1
 }
+cp "$SOURCE_DIR/persist.py" "$DEST_DIR/" || {
+    echo "Error: Failed to copy persist.py"
+    exit 1
+}
+cp "$SOURCE_DIR/power.py" "$DEST_DIR/" || {
+    echo "Error: Failed to copy power.py"
+    exit 1
+}
+cp "$SOURCE_DIR/record.py" "$DEST_DIR/" || {
+    echo "Error: Failed to copy record.py"
+    exit 1
+}
+cp "$SOURCE_DIR/keymap.py" "$DEST_DIR/" || {
+    echo "Error: Failed to copy keymap.py"
+    exit 1
+}
 
 # Make clocktemp.py executable
 echo "Making clocktemp.py executable..."
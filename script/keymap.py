@@ -0,0 +1,217 @@
+"""
+# keymap.py - Copyright (c) 2025 Arthur Dantas
+# This file is part of ClockTemp, licensed under the GNU General Public License v3.
+# See <https://www.gnu.org/licenses/> for details.
+"""
+
+from configparser import ConfigParser, Error as ConfigError
+from persist import save_state
+from tools import Keys
+import curses
+import os
+import time
+
+MODES = ("clock", "calendar", "stopwatch", "timer", "help")
+
+# Default key bindings file, read if it exists
+CONFIG_DIR = os.path.join(os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config"), "clocktemp")
+KEYS_FILE = os.path.join(CONFIG_DIR, "keys.conf")
+
+# Names shown in the on-screen hints for keys that are not printable
+HINT_NAMES = {
+    Keys.ESC: "ESC",
+    Keys.SPACE: "SPACEBAR",
+    Keys.TAB: "TAB",
+}
+
+# Key names accepted in the bindings file besides single characters
+KEY_NAMES = {
+    "ESC": Keys.ESC,
+    "SPACE": Keys.SPACE,
+    "TAB": Keys.TAB,
+    "DOT": Keys.DOT,
+    "COMMA": Keys.COMMA,
+    "LESS": Keys.LESS,
+    "GREATER": Keys.GREATER,
+}
+
+# Handlers return True to quit the program
+def quit_program(state, args):
+    return True
+
+def clock_mode(state, args):
+    state.mode = "clock"
+    state.timer_input_mode = False
+    curses.curs_set(0)
+
+def calendar_mode(state, args):
+    state.mode = "calendar"
+    state.timer_input_mode = False
+    curses.curs_set(0)
+
+def stopwatch_mode(state, args):
+    state.mode = "stopwatch"
+    state.timer_input_mode = False
+    curses.curs_set(0)
+
+def timer_mode(state, args):
+    state.mode = "timer"
+    if state.timer_total_time == 0:
+        state.timer_input_mode = True
+
+def help_mode(state, args):
+    state.mode = "help"
+    state.timer_input_mode = False
+
+def reset_stopwatch(state, args):
+    state.stopwatch_start = time.time()
+    state.stopwatch_accumulated = 0
+    state.stopwatch_running = args.a == "false"
+    if args.p == "true":
+        save_state(state)
+
+def reset_timer(state, args):
+    state.timer_start = time.time()
+    state.timer_total_time = state.initial_time
+    state.timer_running = args.a == "false"
+    if args.p == "true":
+        save_state(state)
+
+def pause_stopwatch(state, args):
+    if state.stopwatch_running:
+        state.stopwatch_accumulated += time.time() - state.stopwatch_start
+        state.stopwatch_running = False
+    else:
+        state.stopwatch_start = time.time()
+        state.stopwatch_running = True
+    if args.p == "true":
+        save_state(state)
+
+def pause_timer(state, args):
+    if state.timer_input_mode:
+        return
+    if state.timer_running:
+        state.timer_running = False
+    else:
+        state.timer_start = time.time() - (state.initial_time - state.timer_total_time)
+        state.timer_running = True
+    if args.p == "true":
+        save_state(state)
+
+def previous_month(state, args):
+    if state.calendar_shown == 12:
+        state.calendar_year -= 1
+    else:
+        state.calendar_month -= 1
+        if state.calendar_month < 1:
+            state.calendar_month = 12
+            state.calendar_year -= 1
+
+def next_month(state, args):
+    if state.calendar_shown == 12:
+        state.calendar_year += 1
+    else:
+        state.calendar_month += 1
+        if state.calendar_month > 12:
+            state.calendar_month = 1
+            state.calendar_year += 1
+
+def cycle_view(state, args):
+    state.calendar_view = {1: 3, 3: 12, 12: 1}[state.calendar_view]
+
+# Action name -> {mode: handler} and its default keys
+ACTIONS = {
+    "quit": ({mode: quit_program for mode in MODES}, "q Q ESC"),
+    "clock": ({mode: clock_mode for mode in MODES}, "w W"),
+    "calendar": ({mode: calendar_mode for mode in MODES}, "c C"),
+    "stopwatch": ({mode: stopwatch_mode for mode in MODES}, "s S"),
+    "timer": ({mode: timer_mode for mode in MODES}, "t T"),
+    "help": ({mode: help_mode for mode in MODES}, "h H"),
+    "reset": ({"stopwatch": reset_stopwatch, "timer": reset_timer}, "r R"),
+    "pause": ({"stopwatch": pause_stopwatch, "timer": pause_timer}, "SPACE"),
+    "prev": ({"calendar": previous_month}, "< ,"),
+    "next": ({"calendar": next_month}, "> ."),
+    "view": ({"calendar": cycle_view}, "v V"),
+}
+
+# Convert "q ESC <" into key codes
+def parse_keys(text):
+    codes = []
+    for name in text.split():
+        if name.upper() in KEY_NAMES:
+            codes.append(KEY_NAMES[name.upper()])
+        elif len(name) == 1:
+            codes.append(ord(name))
+        else:
+            raise ValueError(f"Invalid key name: {name}")
+    return codes
+
+# Read the [keys] section of a bindings file over the default bindings
+def load_bindings(path=None):
+    bindings = {action: parse_keys(keys) for action, (handlers, keys) in ACTIONS.items()}
+
+    if path is None:
+        path = KEYS_FILE
+        if not os.path.exists(path):
+            return bindings
+    elif not os.path.exists(path):
+        raise ValueError(f"Key bindings file not found: {path}")
+
+    # ConfigParser.read silently skips files it can't open, so open it here
+    config = ConfigParser(interpolation=None)
+    try:
+        with open(path, encoding="utf-8") as f:
+            config.read_file(f)
+    except OSError as e:
+        raise ValueError(f"Can't read key bindings file {path}: {e.strerror}")
+    except UnicodeDecodeError:
+        raise ValueError(f"Invalid key bindings file {path}: not valid UTF-8")
+    except ConfigError as e:
+        raise ValueError(f"Invalid key bindings file {path}: {e}")
+
+    if config.has_section("keys"):
+        for action, keys in config.items("keys"):
+            if action not in ACTIONS:
+                raise ValueError(f"Invalid action in {path}: {action}. Choose from {list(ACTIONS)}")
+            bindings[action] = parse_keys(keys)
+            if not bindings[action]:
+                raise ValueError(f"No keys bound to action in {path}: {action}")
+
+    return bindings
+
+# Label of a key in the on-screen hints, a letter bound in both cases is shown in upper case
+def key_name(code, codes=()):
+    if code in HINT_NAMES:
+        return HINT_NAMES[code]
+    char = chr(code)
+    if char.swapcase() != char and ord(char.swapcase()) in codes:
+        return char.upper()
+    return char
+
+# Build one key code -> handler table per mode so a keypress is a single lookup
+def build_keymaps(bindings):
+    keymaps = {mode: {} for mode in MODES}
+    bound = {mode: {} for mode in MODES} # Action already using each key, per mode
+    for action, codes in bindings.items():
+        if not codes:
+            raise ValueError(f"No keys bound to action: {action}")
+        handlers = ACTIONS[action][0]
+        for mode, handler in handlers.items():
+            for code in codes:
+                other = bound[mode].get(code, action)
+                if other != action:
+                    raise ValueError(f"Key {key_name(code)} is bound to both {other} and {action} in {mode} mode")
+                bound[mode][code] = action
+                keymaps[mode][code] = handler
+    return keymaps
+
+# Distinct key labels of each action for the on-screen hints, e.g. ["Q", "ESC"]
+def key_labels(bindings):
+    labels = {}
+    for action, codes in bindings.items():
+        labels[action] = []
+        for code in codes:
+            label = key_name(code, codes)
+            if label not in labels[action]:
+                labels[action].append(label)
+    return labels
@@ -5,8 +5,9 @@
 """
 
 from clock import render_digits, format_clock, format_time
-from temperature import get_weather
-from cal import render_calendar
+from temperature import get_weather, format_temp, render_sparkline
+from persist import save_weather
+from cal import render_calendar, choose_layout, WEEKDAYS, ATTR_HEADER, ATTR_HIGHLIGHT
 from datetime import datetime
 from curses.textpad import Textbox, rectangle
 from math import ceil
@@ -29,6 +30,10 @@ def center_highlighted_text(stdscr, height, width, text, description, start_y_of
             stdscr.addstr(start_y_offset + i, start_x, line, curses.color_pair(1) | curses.A_BOLD)
             stdscr.addstr(start_y_offset + i, start_x + len(line), description, curses.color_pair(1) | (curses.A_DIM if args.bd == "false" else curses.A_BOLD))
 
+# Hint label for the keys bound to an action, e.g. "Q / ESC : "
+def key_hint(args, action):
+    return " / ".join(args.keylabels[action]) + " : "
+
 def help_menu(stdscr, height, width, args):
     # Centralize help menu on terminal
     logo = """
@@ -43,11 +48,12 @@ def help_menu(stdscr, height, width, args):
     logo_start_y = (height -12) // 2
 
     center_highlighted_text(stdscr, height, logo_start_x, logo.splitlines(), "", logo_start_y, args)
-    center_highlighted_text(stdscr, height, width - 29, "W : ", "Clock Mode", logo_start_y + 7, args)
-    center_highlighted_text(stdscr, height, width + 25, "C : ", "Calendar Mode", logo_start_y + 7, args)
-    center_highlighted_text(stdscr, height, width - 25, "S : ", "Stopwatch Mode", logo_start_y + 9, args)
-    center_highlighted_text(stdscr, height, width + 21, "T : ", "Timer Mode", logo_start_y + 9, args)
-    center_highlighted_text(stdscr, height, width - 2, "Q / ESC : ", "Close program", logo_start_y + 11, args)
+    # Offsets keep the two columns aligned when a hint has more than one key
+    for action, description, offset, line in (("clock", "Clock Mode", -29, 7), ("calendar", "Calendar Mode", 25, 7),
+                                              ("stopwatch", "Stopwatch Mode", -25, 9), ("timer", "Timer Mode", 21, 9)):
+        hint = key_hint(args, action)
+        center_highlighted_text(stdscr, height, width + offset + len(hint) - 4, hint, description, logo_start_y + line, args)
+    center_highlighted_text(stdscr, height, width - 2, key_hint(args, "quit"), "Close program", logo_start_y + 11, args)
 
 def draw_clock(stdscr, height, width, state, args):
 
@@ -57,14 +63,14 @@ def draw_clock(stdscr, height, width, state, args):
     if time.time() - state.last_temp_update >= 600:
         try:
             current_temp = get_weather(args.lat, args.lon)
+            state.last_temp_update = time.time()
             if isinstance(current_temp, (int, float)):
-                if args.tu == "f":
-                    temp_format = f"{float((current_temp * 9/5) + 32):.1f}"
-                else:
-                    temp_format = f"{float(current_temp):.1f}"
+                temp_format = format_temp(current_temp, args.tu)
+                state.temp_history.append(current_temp)
+                if args.th == "true":
+                    save_weather(state, args)
             else:
                 temp_format = "N/A"
-            state.last_temp_update = time.time()
         except:
             temp_format = "N/A"
 
@@ -98,37 +104,58 @@ def draw_clock(stdscr, height, width, state, args):
     center_highlighted_text(stdscr, height, width, current_time_lines, "", clock_start_y, args)
     center_highlighted_text(stdscr, height, width, "", date_temp, clock_start_y + 6, args)
 
+    # Temperature history sparkline with min/max under the date
+    history = state.temp_history.to_list()
+    if history:
+        history_unit = "ºF" if args.tu == "f" else "ºC"
+        history_range = f" {format_temp(min(history), args.tu)}-{format_temp(max(history), args.tu)}{history_unit}"
+        center_highlighted_text(stdscr, height, width, render_sparkline(history), history_range, clock_start_y + 7, args)
+
     return temp_format, state.last_temp_update
 
 def draw_calendar(stdscr, height, width, state, args):
 
+    # Use the layout with the most months per row that fits the terminal
+    count, columns = choose_layout(state.calendar_view, width, height)
+    state.calendar_shown = count
+
     # Centralize calendar on terminal
-    calendar_lines, calendar_attrs = render_calendar(state.calendar_year, state.calendar_month)
-    calendar_height = len(calendar_lines)
-    calendar_width = max(len(line) for line in calendar_lines)
+    calendar_rows, calendar_width, today = render_calendar(state.calendar_year, state.calendar_month, count, columns, WEEKDAYS[args.fw])
+    calendar_height = len(calendar_rows)
     calendar_start_y = (height - calendar_height) // 2 - 1
     calendar_start_x = (width - calendar_width) // 2
 
+    # Year title above the 12 month view
+    if count == 12 and calendar_start_y >= 2:
+        center_highlighted_text(stdscr, height, width, str(state.calendar_year), "", calendar_start_y - 2, args)
+
     # Centralize hint on terminal
     calendar_hint_start_y = calendar_start_y + calendar_height + 1
 
-    center_highlighted_text(stdscr, height, width + 1, "<             >", "", calendar_hint_start_y, args)
+    prev_key, next_key = args.keylabels["prev"][0], args.keylabels["next"][0]
+    arrows = prev_key + " " * max(13, 15 - len(prev_key) - len(next_key)) + next_key
+    center_highlighted_text(stdscr, height, width + 1, arrows, "", calendar_hint_start_y, args)
     center_highlighted_text(stdscr, height, width + 1, "", "Prev | Next", calendar_hint_start_y, args)
-
-    for i, line in enumerate(calendar_lines):
-        if i < 2:
-            # Header
-            if calendar_start_y + i < height and calendar_start_x + len(line) <= width:
-                center_highlighted_text(stdscr, height, width, "", line, calendar_start_y + i, args)
-        else:
-            # Current day highlighted
-            if calendar_start_y + i < height and calendar_start_x + len(line) <= width:
-                x = calendar_start_x
-                for j, char in enumerate(line):
-                    attr = curses.color_pair(calendar_attrs[i-2][j]) if (i-2) < len(calendar_attrs) and j < len(calendar_attrs[i-2]) else curses.color_pair(1)
-                    if x < width:
-                        stdscr.addch(calendar_start_y + i, x, char, attr)
-                    x += 1
+    center_highlighted_text(stdscr, height, width, key_hint(args, "view"), "Change view", calendar_hint_start_y + 1, args)
+
+    header_attr = curses.color_pair(1) | (curses.A_DIM if args.bd == "false" else curses.A_BOLD)
+
+    for i, row in enumerate(calendar_rows):
+        y = calendar_start_y + i
+        if y < 0 or y >= height:
+            continue
+        for x, text, attr in row:
+            x += calendar_start_x
+            if x >= 0 and x + len(text) <= width:
+                stdscr.addstr(y, x, text, header_attr if attr == ATTR_HEADER else curses.color_pair(attr))
+
+    # Current day highlighted
+    if today is not None:
+        y, x, day = today
+        y += calendar_start_y
+        x += calendar_start_x
+        if 0 <= y < height and x >= 0 and x + len(day) <= width:
+            stdscr.addstr(y, x, day, curses.color_pair(ATTR_HIGHLIGHT))
 
 def draw_stopwatch(stdscr, height, width, state, args):
 
@@ -147,8 +174,8 @@ def draw_stopwatch(stdscr, height, width, state, args):
 
     center_highlighted_text(stdscr, height, width, current_stop_lines, "", stopwatch_start_y, args)
     center_highlighted_text(stdscr, height, width, "", "Mode : Stopwatch", stopwatch_start_y - 2, args)
-    center_highlighted_text(stdscr, height, width, "SPACEBAR : ", "Pause/Resume", stopwatch_start_y + 6, args)
-    center_highlighted_text(stdscr, height, width, "R : ", "Reset", stopwatch_start_y + 7, args)
+    center_highlighted_text(stdscr, height, width, key_hint(args, "pause"), "Pause/Resume", stopwatch_start_y + 6, args)
+    center_highlighted_text(stdscr, height, width, key_hint(args, "reset"), "Reset", stopwatch_start_y + 7, args)
 
     return state.stopwatch_accumulated, state.stopwatch_running
 
@@ -246,8 +273,8 @@ def draw_timer(stdscr, height, width, state, args):
 
             center_highlighted_text(stdscr, height, width, current_timer_lines, "", timer_start_y, args)
             center_highlighted_text(stdscr, height, width, "", "Mode : Timer", timer_start_y - 2, args)
-            center_highlighted_text(stdscr, height, width, "SPACEBAR : ", "Pause/Resume", timer_start_y + 6, args)
-            center_highlighted_text(stdscr, height, width, "R : ", "Reset", timer_start_y + 7, args)
+            center_highlighted_text(stdscr, height, width, key_hint(args, "pause"), "Pause/Resume", timer_start_y + 6, args)
+            center_highlighted_text(stdscr, height, width, key_hint(args, "reset"), "Reset", timer_start_y + 7, args)
 
         return state.timer_total_time, state.initial_time, state.timer_running, state.timer_input_mode
 
@@ -0,0 +1,168 @@
+"""
+# persist.py - Copyright (c) 2025 Arthur Dantas
+# This file is part of ClockTemp, licensed under the GNU General Public License v3.
+# See <https://www.gnu.org/licenses/> for details.
+"""
+
+import json
+import math
+import os
+import time
+
+from temperature import format_temp
+
+# Directory where ClockTemp keeps its state files
+STATE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"), "clocktemp")
+STATE_FILE = os.path.join(STATE_DIR, "state")
+
+# Weather cache with the last update time and temperature history
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "clocktemp")
+WEATHER_FILE = os.path.join(CACHE_DIR, "weather")
+
+# Compact the log once it grows past this size, restore reads at most TAIL_SIZE bytes
+MAX_SIZE = 16384
+TAIL_SIZE = 4096
+
+# Fields saved on every stopwatch/timer transition
+STATE_FIELDS = (
+    "stopwatch_start", "stopwatch_accumulated", "stopwatch_running",
+    "timer_start", "timer_total_time", "initial_time", "timer_running",
+)
+
+# Flags must be stored as JSON booleans, bool("false") would be True
+def to_bool(value):
+    if not isinstance(value, bool):
+        raise TypeError(f"Expected a boolean, got {value!r}")
+    return value
+
+# Type each field is converted to when restored
+STATE_TYPES = {
+    "stopwatch_start": float,
+    "stopwatch_accumulated": float,
+    "stopwatch_running": to_bool,
+    "timer_start": float,
+    "timer_total_time": int,
+    "initial_time": int,
+    "timer_running": to_bool,
+}
+
+# Snapshot the stopwatch and timer fields, start times are wall clock anchors
+def snapshot_state(state):
+    record = {field: getattr(state, field) for field in STATE_FIELDS}
+    record["saved_at"] = time.time()
+    return record
+
+# Append one record as a single write so a crash leaves at most one torn line
+def append_record(path, record):
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+        os.fsync(fd)
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+    # Keep the log small by replacing it with its last record
+    if size > MAX_SIZE:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as tmp:
+            tmp.write(line)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, path)
+
+# Read the last complete record from the end of the log
+def read_last_record(path):
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - TAIL_SIZE))
+            tail = f.read()
+    except OSError:
+        return None
+
+    for line in reversed(tail.splitlines()):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue # Torn or partial line
+        if isinstance(record, dict):
+            return record
+    return None
+
+def save_state(state, path=STATE_FILE):
+    try:
+        append_record(path, snapshot_state(state))
+    except OSError:
+        pass # Never let a failed checkpoint stop the clock
+
+def load_state(state, path=STATE_FILE):
+    record = read_last_record(path)
+    if record is None:
+        return False
+
+    # A corrupt checkpoint is ignored instead of stopping ClockTemp from starting
+    try:
+        values = {field: STATE_TYPES[field](record[field]) for field in STATE_FIELDS}
+    except (ValueError, KeyError, TypeError, OverflowError):
+        return False
+
+    for field, value in values.items():
+        setattr(state, field, value)
+
+    # A running timer that expired while ClockTemp was closed is cleared
+    if state.timer_running and time.time() - state.timer_start >= state.initial_time:
+        state.timer_running = False
+        state.timer_total_time = 0
+
+    # Go straight to the countdown screen when a timer was restored
+    if state.timer_total_time > 0:
+        state.timer_input_mode = False
+
+    return True
+
+# Replace the weather cache in one step so readers never see a partial file
+def save_weather(state, args, path=WEATHER_FILE):
+    record = {
+        "lat": args.lat,
+        "lon": args.lon,
+        "updated": state.last_temp_update,
+        "history": state.temp_history.to_list(),
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as tmp:
+            json.dump(record, tmp, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+def load_weather(state, args, path=WEATHER_FILE):
+    try:
+        with open(path) as f:
+            record = json.load(f)
+        history = [float(value) for value in record["history"]]
+        updated = float(record["updated"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    # NaN or Infinity in the cache can't be drawn, drop the whole cache
+    if not all(math.isfinite(value) for value in history + [updated]):
+        return False
+
+    # History from another location is not shown
+    if record.get("lat") != args.lat or record.get("lon") != args.lon:
+        return False
+
+    state.temp_history.extend(history)
+
+    # Reuse the last reading while it is still fresh to avoid an extra fetch
+    if history and time.time() - updated < 600:
+        state.last_temp = format_temp(history[-1], args.tu)
+        state.last_temp_update = updated
+
+    return True
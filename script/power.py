@@ -0,0 +1,66 @@
+"""
+# power.py - Copyright (c) 2025 Arthur Dantas
+# This file is part of ClockTemp, licensed under the GNU General Public License v3.
+# See <https://www.gnu.org/licenses/> for details.
+"""
+
+from datetime import datetime, timedelta, time as dt_time
+import time
+
+FRAME_TIME = 0.02       # Frame time used by screens that can't predict their next change
+TEMP_UPDATE_TIME = 600  # Matches the temperature refresh in draw_clock
+
+# Next local midnight, when the date and the calendar highlight change
+def next_midnight(now):
+    tomorrow = datetime.fromtimestamp(now).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, dt_time()).timestamp()
+
+# Time of the next change on screen, or None if only a keypress can change it
+def next_redraw(state, args, now):
+    if state.mode == "clock":
+        # Seconds roll over every second, otherwise at the minute (also covers the date change)
+        next_change = now - now % 1 + 1 if args.s == "true" else now - now % 60 + 60
+        # An overdue or failed update is retried at the next change instead of every frame
+        temp_update = state.last_temp_update + TEMP_UPDATE_TIME
+        return min(next_change, temp_update) if temp_update > now else next_change
+
+    if state.mode == "calendar":
+        return next_midnight(now) # Current day highlight
+
+    if state.mode == "stopwatch":
+        if not state.stopwatch_running:
+            return None
+        # The shown value is int(elapsed), it changes when elapsed reaches the next whole second
+        elapsed = now - state.stopwatch_start + state.stopwatch_accumulated
+        return now + 1 - elapsed % 1
+
+    if state.mode == "timer" and not state.timer_input_mode:
+        if not state.timer_running:
+            return None
+        # The shown value is int(remaining), it changes when remaining reaches a whole second
+        remaining = state.initial_time - (now - state.timer_start)
+        return now + (remaining % 1 or 1)
+
+    if state.mode == "help":
+        return None
+
+    return now + FRAME_TIME
+
+# Timeout in milliseconds for getch until the deadline, -1 blocks until a keypress
+def wait_timeout(deadline, now):
+    if deadline is None:
+        return -1
+    return max(0, int((deadline - now) * 1000) + 1)
+
+# Counts loop wakeups to measure how often ClockTemp leaves the idle state
+class WakeupCounter:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.wakeups = 0
+
+    def tick(self):
+        self.wakeups += 1
+
+    def per_minute(self):
+        minutes = (time.monotonic() - self.started) / 60
+        return self.wakeups / minutes if minutes > 0 else 0.0
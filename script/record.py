@@ -0,0 +1,194 @@
+"""
+# record.py - Copyright (c) 2025 Arthur Dantas
+# This file is part of ClockTemp, licensed under the GNU General Public License v3.
+# See <https://www.gnu.org/licenses/> for details.
+"""
+
+import curses
+import json
+import os
+import time
+
+FLUSH_EVENTS = 64    # Write buffered events after this many frames
+FLUSH_INTERVAL = 10  # or after this many seconds
+
+BLANK = (" ", None)  # Erased cell, drawn with the background of color pair 1
+
+# Wraps stdscr, mirrors what is drawn and records the changes of each frame as asciicast v2
+class Recorder:
+    def __init__(self, stdscr, path, color_pairs):
+        self.stdscr = stdscr
+        self.color_pairs = color_pairs # Pair number -> (foreground, background)
+        self.segments = []             # (y, x, text, attr) drawn since the last erase
+        self.last_frame = None
+        self.last_rows = None          # Cells of the last recorded frame, None forces a full repaint
+        self.current_sgr = None        # SGR still active in the recorded output
+        self.sgr_cache = {}
+        self.events = []
+        self.started = time.monotonic()
+        self.last_flush = self.started
+        self.height, self.width = stdscr.getmaxyx()
+
+        # Line drawing characters used by curses.textpad.rectangle
+        self.acs_map = {}
+        for name, char in (("ACS_VLINE", "│"), ("ACS_HLINE", "─"), ("ACS_ULCORNER", "┌"),
+                           ("ACS_URCORNER", "┐"), ("ACS_LLCORNER", "└"), ("ACS_LRCORNER", "┘")):
+            if hasattr(curses, name):
+                self.acs_map[getattr(curses, name)] = char
+
+        self.file = open(path, "w", encoding="utf-8")
+        header = {
+            "version": 2,
+            "width": self.width,
+            "height": self.height,
+            "timestamp": int(time.time()),
+            "env": {"TERM": os.environ.get("TERM", ""), "SHELL": os.environ.get("SHELL", "")},
+        }
+        self.file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    # Everything not drawn through the methods below goes straight to stdscr
+    def __getattr__(self, name):
+        return getattr(self.stdscr, name)
+
+    def char(self, ch):
+        if isinstance(ch, str):
+            return ch
+        return self.acs_map.get(ch) or chr(ch & curses.A_CHARTEXT)
+
+    def addstr(self, *args):
+        self.stdscr.addstr(*args)
+        if len(args) >= 3 and args[2]:
+            self.segments.append((args[0], args[1], args[2], args[3] if len(args) > 3 else 0))
+
+    def addch(self, *args):
+        self.stdscr.addch(*args)
+        if len(args) >= 3:
+            self.segments.append((args[0], args[1], self.char(args[2]), args[3] if len(args) > 3 else 0))
+
+    def hline(self, y, x, ch, n):
+        self.stdscr.hline(y, x, ch, n)
+        self.segments.append((y, x, self.char(ch) * n, 0))
+
+    def vline(self, y, x, ch, n):
+        self.stdscr.vline(y, x, ch, n)
+        for i in range(n):
+            self.segments.append((y + i, x, self.char(ch), 0))
+
+    def erase(self):
+        self.stdscr.erase()
+        self.segments = []
+
+    def clear(self):
+        self.stdscr.clear()
+        self.segments = []
+
+    def refresh(self):
+        self.stdscr.refresh()
+
+        height, width = self.stdscr.getmaxyx()
+        if (height, width) != (self.height, self.width):
+            self.height, self.width = height, width
+            self.add_event("r", f"{width}x{height}")
+            self.last_frame = None
+            self.last_rows = None
+
+        # Only record frames that differ from the previous one
+        frame = tuple(self.segments)
+        if frame != self.last_frame:
+            self.last_frame = frame
+            rows = self.cells(frame)
+            self.add_event("o", self.render(rows))
+            self.last_rows = rows
+
+        # Buffered events are written even while the screen stays the same
+        if self.events and time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    # Turn curses attributes into an ANSI SGR sequence
+    def sgr(self, attr):
+        if attr not in self.sgr_cache:
+            codes = ["0"]
+            foreground, background = self.color_pairs.get(curses.pair_number(attr), (-1, -1))
+            if foreground >= 0:
+                codes.append(str(30 + foreground))
+            if background >= 0:
+                codes.append(str(40 + background))
+            if attr & curses.A_BOLD:
+                codes.append("1")
+            if attr & curses.A_DIM:
+                codes.append("2")
+            self.sgr_cache[attr] = f"\x1b[{';'.join(codes)}m"
+        return self.sgr_cache[attr]
+
+    # Place the drawn segments into rows of (char, attr) cells
+    def cells(self, frame):
+        rows = {}
+        for y, x, text, attr in frame:
+            if not 0 <= y < self.height:
+                continue
+            row = rows.get(y)
+            if row is None:
+                row = rows[y] = [BLANK] * self.width
+            for i, char in enumerate(text):
+                if 0 <= x + i < self.width:
+                    row[x + i] = (char, attr)
+        return rows
+
+    # Output only the span of each row that changed since the last frame
+    def render(self, rows):
+        base = self.sgr(curses.color_pair(1))
+        output = []
+        previous = self.last_rows
+        if previous is None:
+            output.append(base + "\x1b[2J")
+            self.current_sgr = base
+            previous = {}
+
+        blank_row = [BLANK] * self.width
+        for y in sorted(rows.keys() | previous.keys()):
+            new = rows.get(y, blank_row)
+            old = previous.get(y, blank_row)
+            if new == old:
+                continue
+
+            first = next(i for i in range(self.width) if new[i] != old[i])
+            last = next(i for i in range(self.width - 1, -1, -1) if new[i] != old[i])
+            content_end = next((i for i in range(self.width - 1, -1, -1) if new[i] != BLANK), -1)
+
+            output.append(f"\x1b[{y + 1};{first + 1}H")
+            for char, attr in new[first:min(last, content_end) + 1]:
+                self.set_sgr(output, base if attr is None else self.sgr(attr))
+                output.append(char)
+
+            # The rest of the row is empty, erase it instead of writing spaces
+            if last > content_end:
+                self.set_sgr(output, base)
+                output.append("\x1b[K")
+
+        return "".join(output)
+
+    # SGR stays active across cursor moves and events, only write it when it changes
+    def set_sgr(self, output, code):
+        if code != self.current_sgr:
+            output.append(code)
+            self.current_sgr = code
+
+    def add_event(self, kind, data):
+        now = time.monotonic()
+        self.events.append(json.dumps([round(now - self.started, 6), kind, data], ensure_ascii=False))
+        if len(self.events) >= FLUSH_EVENTS or now - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if self.events:
+            self.file.write("\n".join(self.events) + "\n")
+            self.file.flush()
+            self.events = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
@@ -4,8 +4,12 @@
 # See <https://www.gnu.org/licenses/> for details.
 """
 
+from array import array
+import math
 import requests
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
 # Get weather data from Open-Meteo
 def get_weather(lat=0, lon=0):
     if lat == "0" and lon == "0":
@@ -18,3 +22,46 @@ def get_weather(lat=0, lon=0):
             return float(temp)
         except requests.RequestException as e:
             return f"Error: {e}"
+
+# Convert a Celsius reading to the unit chosen with -tu and format it
+def format_temp(celsius, unit="c"):
+    if unit == "f":
+        return f"{float((celsius * 9/5) + 32):.1f}"
+    return f"{float(celsius):.1f}"
+
+# Fixed-size ring buffer of the last temperature readings (in Celsius)
+class TempHistory:
+    def __init__(self, size=24):
+        self.size = size
+        self.values = array("d", [0.0] * size)
+        self.start = 0
+        self.count = 0
+
+    def append(self, value):
+        # NaN or Infinity would break the sparkline scale
+        if not math.isfinite(value):
+            return
+        # Once full, overwrite the oldest reading
+        end = (self.start + self.count) % self.size
+        self.values[end] = value
+        if self.count < self.size:
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % self.size
+
+    def to_list(self):
+        # Readings from oldest to newest
+        return [self.values[(self.start + i) % self.size] for i in range(self.count)]
+
+    def extend(self, values):
+        for value in values[-self.size:]:
+            self.append(float(value))
+
+# Render readings as a Unicode sparkline scaled between min and max
+def render_sparkline(values):
+    low, high = min(values), max(values)
+    span = high - low
+    if span == 0:
+        return SPARK_CHARS[len(SPARK_CHARS) // 2] * len(values)
+    steps = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[round((value - low) / span * steps)] for value in values)